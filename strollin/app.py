@@ -5,7 +5,7 @@ This module ties together webcam-based face recognition and Spotify playback.
 Typical flow:
 - Load known face encodings from `known_faces/` (or path set by `KNOWN_FACES_DIR`).
 - Initialize a `SpotifyClient` (handles OAuth and playback).
-- Capture frames from the default webcam and run face recognition.
+- Capture frames from the default webcam and run face recognition (on separate threads).
 - When a known face is found, map the person's name to a Spotify URI and start playback.
 
 Notes:
@@ -15,16 +15,32 @@ Notes:
 """
 
 import os
+import queue
+import signal
+import sys
+import threading
 import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from faces import load_known_faces, recognize_faces
+from faces import FaceRecognizer, RecognitionCache, load_known_faces
 from spotify_client import SpotifyClient
 
 KNOWN_DIR = os.getenv("KNOWN_FACES_DIR", "known_faces")
 COOLDOWN_SECONDS = 10
+# Run face recognition on every Nth frame and reuse the last result in between;
+# people move slowly relative to the camera frame rate.
+DETECT_EVERY_N_FRAMES = max(1, int(os.getenv("DETECT_EVERY_N_FRAMES", "3")))
+# Requested capture mode; drivers may pick the nearest supported one.
+CAMERA_WIDTH = 640
+CAMERA_HEIGHT = 480
+CAMERA_FPS = 30
+# Show the camera preview window (press 'q' to quit). Off by default: copying every
+# frame to a window and pumping GUI events is wasted work on a headless device.
+DEBUG_UI = os.getenv("STROLLIN_UI", "0") == "1"
 
 
 def main():
@@ -33,8 +49,17 @@ def main():
     Behavior:
     - Loads known faces from `KNOWN_DIR` (default: `known_faces/`).
     - Initializes `SpotifyClient` (will prompt for OAuth if not authorized).
-    - Captures frames from the default camera (index 0).
-    - If one or more known faces are visible, calls `SpotifyClient.play_for(name)`.
+    - Captures 640x480 frames from the default camera (index 0) using the platform's
+      native backend with a one-frame buffer, and runs recognition on every
+      `DETECT_EVERY_N_FRAMES`-th frame, reusing the previous result in between.
+    - If one or more known faces are visible, calls `SpotifyClient.play_for(name)` on a
+      background worker thread.
+
+    Capture, recognition and display/playback dispatch each run on their own thread,
+    connected by one-slot queues that always hold the most recent item.
+
+    The preview window is only shown when `STROLLIN_UI=1` (quit with 'q'); otherwise
+    the app runs headless and stops on Ctrl+C.
 
     Returns:
         None
@@ -42,54 +67,182 @@ def main():
     Error modes:
     - If the webcam cannot be opened, prints a message and returns.
     - If Spotify credentials are missing/misconfigured, `SpotifyClient` will raise.
+    - If the capture or recognition thread raises, the traceback is printed, the
+      pipeline stops and the process exits with status 1.
 
     Example:
         python app.py
     """
 
+    # OpenCV, dlib (OpenMP), NumPy's BLAS and Numba each default to a pool sized to
+    # every core and end up fighting over the CPU ("over-subscription by multiple
+    # thread pools"). Leave OpenMP to dlib's detection, keep BLAS single-threaded for
+    # the small gallery matmuls, give the optional Numba matching kernels (which run
+    # between detections, never alongside them) the same share as OpenMP, and stop
+    # OpenCV from spawning its own pool. The env vars only take effect if set before
+    # numpy/numba/cv2/face_recognition are first imported.
+    worker_threads = str(max(1, (os.cpu_count() or 2) // 2))
+    os.environ.setdefault("OMP_NUM_THREADS", worker_threads)
+    os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+    os.environ.setdefault("NUMBA_NUM_THREADS", worker_threads)
+
     try:
         import cv2
     except Exception:
         raise RuntimeError("opencv-python is required to run the main app. Install with pip.")
+    cv2.setNumThreads(1)
 
     print("Loading known faces...")
-    known_encodings, known_names = load_known_faces(KNOWN_DIR)
+    known_index, known_names = load_known_faces(KNOWN_DIR)
     print(f"Loaded {len(known_names)} known people: {known_names}")
 
     spotify = SpotifyClient()
 
     last_seen = {}
 
-    cap = cv2.VideoCapture(0)
+    cap = _open_camera(cv2)
     if not cap.isOpened():
         print("Could not open webcam. Exiting.")
         return
 
-    try:
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-
-            names = recognize_faces(frame, known_encodings, known_names)
-            if names:
-                for name in names:
-                    now = time.time()
-                    if name not in last_seen or (now - last_seen[name]) > COOLDOWN_SECONDS:
-                        print(f"Recognized: {name}; triggering Spotify playback")
-                        # SpotifyClient maps name -> track/playlist from mappings.json
-                        spotify.play_for(name)
-                        last_seen[name] = now
-
-            # show the frame (optional)
-            cv2.imshow('Face-Spotify', frame)
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
-    except KeyboardInterrupt:
+    # Capture -> recognition -> display run on separate threads joined by one-slot
+    # queues, so a slow recognition pass or Spotify request never stalls the camera.
+    frame_q = queue.Queue(maxsize=1)
+    names_q = queue.Queue(maxsize=1)
+    stop = threading.Event()
+    failed = threading.Event()
+    recognizer = FaceRecognizer(known_index, known_names, cache=RecognitionCache())
+    capture_thread = threading.Thread(target=_run_worker,
+                                      args=(_capture_loop, stop, failed, cap, frame_q, stop),
+                                      daemon=True)
+    recognize_thread = threading.Thread(target=_run_worker,
+                                        args=(_recognize_loop, stop, failed, frame_q, names_q,
+                                              stop, recognizer),
+                                        daemon=True)
+
+    def _on_sigint(signum, _frame):
+        # Ctrl+C is the way to quit when there is no preview window.
         print("Stopped by user")
+        stop.set()
+
+    previous_sigint = signal.signal(signal.SIGINT, _on_sigint)
+
+    # Playback is an HTTPS round trip; keep it off the display/cooldown thread.
+    executor = ThreadPoolExecutor(max_workers=1)
+    capture_thread.start()
+    recognize_thread.start()
+
+    try:
+        while not stop.is_set():
+            try:
+                frame, names = names_q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            for name in names:
+                now = time.time()
+                if name not in last_seen or (now - last_seen[name]) > COOLDOWN_SECONDS:
+                    print(f"Recognized: {name}; triggering Spotify playback")
+                    # SpotifyClient maps name -> track/playlist from mappings.json
+                    executor.submit(spotify.play_for, name)
+                    last_seen[name] = now
+
+            if DEBUG_UI:
+                cv2.imshow('Face-Spotify', frame)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
     finally:
+        signal.signal(signal.SIGINT, previous_sigint)
+        stop.set()
+        # VideoCapture isn't thread-safe, so wait for the capture thread to leave
+        # cap.read() (at most one frame period) before releasing the camera below.
+        capture_thread.join()
+        recognize_thread.join(timeout=1.0)
+        # Don't hold up exit on an in-flight Spotify request, and drop queued ones.
+        executor.shutdown(wait=False, cancel_futures=True)
         cap.release()
-        cv2.destroyAllWindows()
+        if DEBUG_UI:
+            cv2.destroyAllWindows()
+
+    if failed.is_set():
+        sys.exit(1)
+
+
+def _open_camera(cv2):
+    """Open camera 0 with the platform's native backend and a one-frame buffer.
+
+    A one-frame driver buffer means `read()` returns the newest frame instead of one
+    queued up while recognition was busy, and VGA capture keeps detection cheap.
+    Falls back to OpenCV's default backend if the native one can't open the camera.
+    """
+    if sys.platform.startswith('linux'):
+        backend = cv2.CAP_V4L2
+    elif sys.platform == 'win32':
+        backend = cv2.CAP_DSHOW
+    elif sys.platform == 'darwin':
+        backend = cv2.CAP_AVFOUNDATION
+    else:
+        backend = cv2.CAP_ANY
+    cap = cv2.VideoCapture(0, backend)
+    if not cap.isOpened() and backend != cv2.CAP_ANY:
+        cap = cv2.VideoCapture(0)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAMERA_WIDTH)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAMERA_HEIGHT)
+    cap.set(cv2.CAP_PROP_FPS, CAMERA_FPS)
+    return cap
+
+
+def _put_latest(q, item):
+    """Put `item` on a one-slot queue, replacing whatever stale item is waiting."""
+    try:
+        q.get_nowait()
+    except queue.Empty:
+        pass
+    q.put_nowait(item)
+
+
+def _run_worker(target, stop, failed, *args):
+    """Run a pipeline thread's loop; on an exception, report it and stop the pipeline.
+
+    Without this a dying worker would leave `main()` waiting forever on an empty queue.
+    """
+    try:
+        target(*args)
+    except Exception:
+        print(f"{target.__name__} failed; stopping")
+        traceback.print_exc()
+        failed.set()
+        stop.set()
+
+
+def _capture_loop(cap, frame_q, stop):
+    """Read frames from `cap` into `frame_q` until `stop` is set or the camera fails."""
+    while not stop.is_set():
+        ret, frame = cap.read()
+        if not ret:
+            stop.set()
+            break
+        _put_latest(frame_q, frame)
+
+
+def _recognize_loop(frame_q, names_q, stop, recognizer):
+    """Recognize faces in frames from `frame_q` and publish `(frame, names)` to `names_q`.
+
+    Recognition runs on every `DETECT_EVERY_N_FRAMES`-th frame; frames in between are
+    published with the previous result.
+    """
+    frame_idx = 0
+    last_names = []
+    while not stop.is_set():
+        try:
+            frame = frame_q.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        if frame_idx % DETECT_EVERY_N_FRAMES == 0:
+            last_names = recognizer.recognize(frame)
+        frame_idx += 1
+        _put_latest(names_q, (frame, last_names))
 
 
 if __name__ == '__main__':
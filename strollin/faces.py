@@ -4,19 +4,227 @@ This module intentionally defers heavy imports (dlib/face_recognition/opencv) un
 functions are called so lightweight tests can import the module without native deps.
 
 Functions
-- load_known_faces(known_dir="known_faces") -> (encodings, names)
-- recognize_faces(frame, known_encodings, known_names, tolerance=0.5) -> [names]
+- load_known_faces(known_dir="known_faces", max_workers=None) -> (index, names)
+- build_index(encodings, quantize=QUANTIZE_INT8) -> index
+- recognize_faces(frame, known_index, known_names, tolerance=0.5, scale=FRAME_SCALE, cache=None) -> [names]
+
+Classes
+- FaceRecognizer(known_index, known_names, ...).recognize(frame) -> [names]
+
+Known encodings are kept in a nearest-neighbour index. If `faiss` is installed a
+FAISS index is used (`IndexFlatL2`, or `IndexHNSWFlat` for large galleries);
+otherwise `FlatL2Index` provides the same `ntotal`/`search` interface in NumPy.
+Setting ``FACE_INDEX_INT8=1`` selects the int8-quantized `Int8FlatL2Index` instead.
+
+Detection uses `FACE_MODEL` ('hog' or 'cnn'), `FACE_UPSAMPLE` and `FACE_MIN_AREA`,
+all read from the environment at import time.
 
 Usage example:
-    encs, names = load_known_faces('known_faces')
-    recognized = recognize_faces(frame, encs, names)
+    index, names = load_known_faces('known_faces')
+    recognized = recognize_faces(frame, index, names)
+
+    recognizer = FaceRecognizer(index, names)  # for a capture loop
+    recognized = recognizer.recognize(frame)
 """
 
+import hashlib
 import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+# Length of the face embedding produced by dlib's ResNet encoder.
+ENCODING_DIM = 128
+
+# Galleries at least this large use an approximate HNSW index when FAISS is available.
+HNSW_MIN_SIZE = 10000
+HNSW_NEIGHBORS = 32
+
+# Galleries at least this large use the Numba kernel in `match_numba` (if installed)
+# for single-neighbour searches; below it BLAS is as fast and JIT warm-up is wasted.
+NUMBA_MIN_SIZE = 2000
+
+# Store known encodings as int8 (4x less memory) when FACE_INDEX_INT8=1.
+QUANTIZE_INT8 = os.getenv('FACE_INDEX_INT8', '0') == '1'
+# Gallery rows widened to float32 at a time by `Int8FlatL2Index` when numba is missing.
+INT8_CHUNK_ROWS = 4096
+
+# Frames are shrunk by this factor (per side) before detection; HOG/CNN detection
+# cost scales with pixel count, so 0.25 makes it roughly 16x cheaper.
+FRAME_SCALE = 0.25
+
+# Face detector: 'hog' (CPU) or 'cnn' (dlib's CNN detector; fast only with a CUDA build
+# of dlib). Each upsample doubles the image before detection to find smaller faces at
+# roughly 4x the cost; with FRAME_SCALE=0.25 one pass is usually needed, 0 only finds
+# faces close to the camera.
+FACE_MODEL = os.getenv('FACE_MODEL', 'hog')
+FACE_UPSAMPLE = int(os.getenv('FACE_UPSAMPLE', '1'))
+# Detections smaller than this many pixels (in full-frame coordinates) are dropped
+# before running the comparatively expensive 128-d encoder on them. dlib's HOG
+# detector finds nothing under about 80 px per side in the image it scans, i.e.
+# about 80 / (FRAME_SCALE * 2**FACE_UPSAMPLE) px in the full frame: 160 px with the
+# defaults, so the default 80x80 filter only prunes with FACE_UPSAMPLE>=3,
+# FRAME_SCALE=1 or the 'cnn' model. Raise it to drop far-away faces instead.
+MIN_FACE_AREA = int(os.getenv('FACE_MIN_AREA', str(80 * 80)))
+
+# File suffixes (lowercase) treated as images in the known faces folder.
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# Encodings cache written inside the known faces folder by `load_known_faces`.
+CACHE_FILENAME = '.cache.npz'
+
+
+class FlatL2Index:
+    """Exact nearest-neighbour index over face encodings, mirroring `faiss.IndexFlatL2`.
+
+    Only the subset of the FAISS API used by this module is provided: the `ntotal`
+    attribute and `search(x, k)`. Like FAISS, returned distances are squared L2.
+    Nearest-neighbour searches on galleries of `NUMBA_MIN_SIZE` or more use the
+    compiled `match_numba.match` kernel when `numba` is installed.
+
+    Args:
+        encodings (numpy.ndarray): ``(N, 128)`` matrix of known face encodings.
+    """
+
+    def __init__(self, encodings):
+        import numpy as np
+
+        self.xb = np.ascontiguousarray(encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        # Precomputed so a query only needs one matrix-vector product (see `search`).
+        self.sq_norms = np.einsum('ij,ij->i', self.xb, self.xb)
+        self.ntotal = len(self.xb)
+
+    def search(self, x, k):
+        """Return the `k` nearest known encodings for each row of `x`.
+
+        Args:
+            x (numpy.ndarray): ``(F, 128)`` query encodings.
+            k (int): Number of neighbours per query (clamped to `ntotal`).
+
+        Returns:
+            tuple: (D, I) ``(F, k)`` arrays of squared distances and row indices,
+                nearest first.
+        """
+        import numpy as np
+
+        x = np.asarray(x, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        k = min(k, self.ntotal)
+        if k == 1 and self.ntotal >= NUMBA_MIN_SIZE:
+            from match_numba import match
+            if match is not None:
+                D = np.empty((len(x), 1), dtype=np.float32)
+                I = np.empty((len(x), 1), dtype=np.int64)
+                for row, q in enumerate(x):
+                    I[row, 0], D[row, 0] = match(self.xb, self.sq_norms, q)
+                return D, I
+        # ||k - q||^2 = ||k||^2 + ||q||^2 - 2 k.q, so all queries are matched against
+        # the gallery with one matrix product (BLAS sgemm) and no (F, N, 128) temporary.
+        dists2 = self.sq_norms[None, :] + np.einsum('ij,ij->i', x, x)[:, None] - 2.0 * (x @ self.xb.T)
+        if k == 1:
+            I = dists2.argmin(axis=1)[:, None]
+        else:
+            I = np.argsort(dists2, axis=1)[:, :k]
+        D = np.take_along_axis(dists2, I, axis=1)
+        return D, I.astype(np.int64)
+
+
+class Int8FlatL2Index:
+    """Exact-search index holding int8-quantized face encodings.
 
+    Encodings are scaled so the largest magnitude maps to 127 and rounded to int8;
+    queries are quantized with the same scale and distances are recovered as
+    ``||k||^2 + ||q||^2 - 2 k.q / scale^2`` using the float norms. Ranking stays very
+    close to `FlatL2Index` at a quarter of the resident memory. Exposes the same
+    `ntotal`/`search(x, k)` interface.
 
-def load_known_faces(known_dir='known_faces'):
-    """Load and return face encodings and labels from a folder structure.
+    With `numba` installed the int8 dot products run in `match_numba.dots_int8`,
+    which reads the gallery as int8: on one core it is about 1.4x faster than
+    `FlatL2Index` for N=10k-50k, and slightly slower for a few thousand encodings.
+    Without numba the gallery is widened to float32 in blocks of `INT8_CHUNK_ROWS`
+    rows for BLAS; that is exact and keeps peak memory per search to a few MB, but
+    is roughly 3x slower than `FlatL2Index`, so the mode then only saves memory.
+
+    Args:
+        encodings (numpy.ndarray): ``(N, 128)`` matrix of known face encodings.
+    """
+
+    def __init__(self, encodings):
+        import numpy as np
+
+        encodings = np.asarray(encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        self.scale = 127.0 / max(float(np.abs(encodings).max(initial=0.0)), 1e-6)
+        self.xb = self._quantize(encodings)
+        self.sq_norms = np.einsum('ij,ij->i', encodings, encodings)
+        self.ntotal = len(self.xb)
+
+    def _quantize(self, x):
+        import numpy as np
+
+        return np.clip(np.rint(x * self.scale), -128, 127).astype(np.int8)
+
+    def search(self, x, k):
+        """Return the `k` nearest known encodings for each row of `x`.
+
+        See `FlatL2Index.search`; distances are approximate squared L2.
+        """
+        import numpy as np
+
+        from match_numba import dots_int8
+
+        x = np.asarray(x, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        k = min(k, self.ntotal)
+        xq = self._quantize(x)
+        if dots_int8 is not None:
+            dots = dots_int8(self.xb, xq)
+        else:
+            # int8 products summed over 128 dims stay below 2**24, so float32 is exact.
+            xq = xq.astype(np.float32)
+            dots = np.empty((len(x), self.ntotal), dtype=np.float32)
+            for start in range(0, self.ntotal, INT8_CHUNK_ROWS):
+                block = self.xb[start:start + INT8_CHUNK_ROWS].astype(np.float32)
+                dots[:, start:start + INT8_CHUNK_ROWS] = xq @ block.T
+        dists2 = (self.sq_norms[None, :] + np.einsum('ij,ij->i', x, x)[:, None]
+                  - np.float32(2.0 / (self.scale * self.scale)) * dots)
+        if k == 1:
+            I = dists2.argmin(axis=1)[:, None]
+        else:
+            I = np.argsort(dists2, axis=1)[:, :k]
+        D = np.take_along_axis(dists2, I, axis=1).astype(np.float32)
+        return D, I.astype(np.int64)
+
+
+def build_index(encodings, quantize=QUANTIZE_INT8):
+    """Build a nearest-neighbour index over known face encodings.
+
+    Args:
+        encodings (numpy.ndarray): ``(N, 128)`` float32 matrix of face encodings.
+        quantize (bool): Build an `Int8FlatL2Index`; defaults to ``FACE_INDEX_INT8=1``.
+
+    Returns:
+        An `Int8FlatL2Index` if `quantize`, else a FAISS index when `faiss` is
+        installed (HNSW once the gallery reaches `HNSW_MIN_SIZE`), otherwise a
+        `FlatL2Index`. Each exposes `ntotal` and `search(x, k)` returning squared
+        L2 distances.
+    """
+    import numpy as np
+
+    if quantize:
+        return Int8FlatL2Index(encodings)
+    try:
+        import faiss
+    except ImportError:
+        return FlatL2Index(encodings)
+
+    encodings = np.ascontiguousarray(encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+    if len(encodings) >= HNSW_MIN_SIZE:
+        index = faiss.IndexHNSWFlat(ENCODING_DIM, HNSW_NEIGHBORS)
+    else:
+        index = faiss.IndexFlatL2(ENCODING_DIM)
+    index.add(encodings)
+    return index
+
+
+def load_known_faces(known_dir='known_faces', max_workers=None):
+    """Load face encodings and labels from a folder structure into a search index.
 
     The expected layout is:
 
@@ -26,53 +234,281 @@ def load_known_faces(known_dir='known_faces'):
             Bob/
                 img1.jpg
 
+    Encodings are cached in ``<known_dir>/.cache.npz`` together with a signature of
+    the image paths and modification times; later runs reuse the cache until an
+    image is added, removed or changed. The cache is not written if any image
+    failed to load or encode, so those images are retried on the next run.
+
+    On a cache miss images are encoded in parallel worker processes. Because of
+    process spawning on Windows/macOS, callers must guard their entry point with
+    ``if __name__ == '__main__':``.
+
     Args:
         known_dir (str): Path to the folder containing subfolders for each person.
+        max_workers (int): Encoder processes to use; defaults to `os.cpu_count()`.
+            1 encodes serially in the calling process.
 
     Returns:
-        tuple: (encodings, names)
-            encodings (list): List of 128-d face encodings (one per image that had a face).
-            names (list): Parallel list of names (folder names) for each encoding.
+        tuple: (index, names)
+            index: Nearest-neighbour index over the 128-d encodings (one per image
+                that had a face), as returned by `build_index`.
+            names (list): Parallel list of names (folder names) for each indexed encoding.
 
     Raises:
-        RuntimeError: If `face_recognition` is not installed.
+        RuntimeError: If `face_recognition` is needed (no valid cache) but not installed.
     """
+    import numpy as np
+
+    if not os.path.isdir(known_dir):
+        return build_index(np.empty((0, ENCODING_DIM), dtype=np.float32)), []
+
+    listing = _list_known_images(known_dir)
+    sig = hashlib.sha1(repr([(path, mtime) for _, path, mtime in listing]).encode()).hexdigest()
+    images = [(person_name, path) for person_name, path, _ in listing]
+    cache_path = os.path.join(known_dir, CACHE_FILENAME)
     try:
-        import face_recognition
+        with np.load(cache_path) as cache:
+            if str(cache['sig']) == sig:
+                return build_index(cache['encs']), cache['names'].tolist()
+    except Exception:
+        # missing, stale-format or unreadable cache: re-encode below
+        pass
+
+    try:
+        import face_recognition  # noqa: F401  (fail early, before starting workers)
     except Exception as e:
         raise RuntimeError("face_recognition is required to load known faces. Install it via pip.") from e
 
+    max_workers = min(max_workers or os.cpu_count() or 1, len(images))
+    if max_workers > 1:
+        # Processes rather than threads: dlib holds the GIL for parts of encoding.
+        with ProcessPoolExecutor(max_workers=max_workers) as ex:
+            results = list(ex.map(_encode_one, images))
+    else:
+        results = [_encode_one(item) for item in images]
+
     encodings = []
     names = []
-    if not os.path.isdir(known_dir):
-        return encodings, names
-
-    for person_name in os.listdir(known_dir):
-        person_dir = os.path.join(known_dir, person_name)
-        if not os.path.isdir(person_dir):
-            continue
-        for fname in os.listdir(person_dir):
-            path = os.path.join(person_dir, fname)
-            try:
-                image = face_recognition.load_image_file(path)
-                face_encs = face_recognition.face_encodings(image)
-                if face_encs:
-                    encodings.append(face_encs[0])
-                    names.append(person_name)
-            except Exception:
-                # ignore files that fail to load/encode
+    errors = 0
+    for enc, person_name, ok in results:
+        if not ok:
+            errors += 1
+        elif enc is not None:
+            encodings.append(enc)
+            names.append(person_name)
+    known = np.asarray(encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+    if errors:
+        # A load/encode failure may be transient (bad install, out of memory), so don't
+        # let the cache record those images as faceless; retry them next start.
+        print(f'{errors} known face image(s) failed to load/encode; not caching encodings')
+    else:
+        try:
+            np.savez(cache_path, sig=sig, encs=known, names=np.array(names, dtype=str))
+        except OSError:
+            # read-only gallery: just skip caching
+            pass
+    return build_index(known), names
+
+
+def _encode_one(item):
+    """Encode the first face in one ``(person_name, path)`` image.
+
+    Returns:
+        tuple: (encoding, person_name, ok). `ok` is False if the file failed to
+            load or encode; otherwise encoding is None only when no face was found.
+    """
+    import face_recognition
+
+    person_name, path = item
+    try:
+        image = face_recognition.load_image_file(path)
+        face_encs = face_recognition.face_encodings(image)
+    except Exception:
+        # skip files that fail to load/encode, but report it to the caller
+        return None, person_name, False
+    return (face_encs[0] if face_encs else None), person_name, True
+
+
+def _list_known_images(known_dir):
+    """Return sorted ``(person_name, path, mtime)`` for every image under `known_dir`'s subfolders.
+
+    Only files with an `IMAGE_EXTENSIONS` suffix are listed, so entries like
+    ``.DS_Store`` or ``Thumbs.db`` are never handed to the image loader. Files that
+    disappear while listing are skipped.
+    """
+    images = []
+    # scandir yields type info with each entry, saving a stat() per name
+    with os.scandir(known_dir) as people:
+        for person in people:
+            if not person.is_dir():
                 continue
-    return encodings, names
+            with os.scandir(person.path) as files:
+                for f in files:
+                    if not (f.name.lower().endswith(IMAGE_EXTENSIONS) and f.is_file()):
+                        continue
+                    try:
+                        # the entry's stat (free on Windows, one call elsewhere) feeds
+                        # the cache signature, so no separate getmtime() per file
+                        mtime = f.stat().st_mtime
+                    except FileNotFoundError:
+                        continue
+                    images.append((person.name, f.path, mtime))
+    return sorted(images)
+
+
+class RecognitionCache:
+    """Small LRU mapping perceptual frame hashes to the names recognized in them.
+
+    Passed to `recognize_faces` so a static scene (same 8x8 difference hash as a
+    recent frame) skips detection and encoding entirely. This is fuzzy memoization:
+    near-identical frames share a result.
+
+    Args:
+        maxsize (int): Number of recent hashes to remember.
+    """
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
 
+    def get(self, key):
+        """Return the cached names for `key` as a tuple, or None on a miss."""
+        names = self._entries.get(key)
+        if names is not None:
+            self._entries.move_to_end(key)
+        return names
 
-def recognize_faces(frame, known_encodings, known_names, tolerance=0.5):
+    def put(self, key, names):
+        """Remember `names` for `key`, evicting the least recently used entry if full."""
+        self._entries[key] = tuple(names)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+def _dhash(frame):
+    """Return the 64-bit difference hash of a BGR frame as bytes."""
+    import cv2
+    import numpy as np
+
+    gray = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (9, 8), interpolation=cv2.INTER_AREA)
+    return np.packbits(gray[:, 1:] > gray[:, :-1]).tobytes()
+
+
+class FaceRecognizer:
+    """Recognize known faces in BGR frames, reusing image buffers between calls.
+
+    The downscaled and RGB frames are written into arrays allocated on the first
+    frame (and again only if the frame size changes), so a 30 fps loop doesn't churn
+    through fresh full-size allocations every frame. Detections smaller than
+    `MIN_FACE_AREA` are skipped before encoding (a no-op at the default scale and
+    upsampling, see `MIN_FACE_AREA`). Not thread-safe: use one
+    instance per recognition thread.
+
+    Args:
+        known_index: Index over known encodings from `load_known_faces`/`build_index`.
+        known_names (list): List of names matching the entries of `known_index`.
+        tolerance (float): Maximum Euclidean distance for a match to count.
+        scale (float): Per-side resize factor applied before detection and encoding;
+            1 disables resizing.
+        cache (RecognitionCache): Optional memo of recent frames; on a perceptual
+            hash hit its names are returned without running detection.
+    """
+
+    def __init__(self, known_index, known_names, tolerance=0.5, scale=FRAME_SCALE, cache=None):
+        self.known_index = known_index
+        self.known_names = known_names
+        self.tolerance = tolerance
+        self.scale = scale
+        self.cache = cache
+        self._frame_shape = None
+        self._small = None
+        self._rgb = None
+
+    def _allocate(self, frame):
+        import numpy as np
+
+        h, w = frame.shape[:2]
+        if self.scale != 1:
+            # same rounding OpenCV uses when resizing with fx/fy
+            w, h = max(1, int(round(w * self.scale))), max(1, int(round(h * self.scale)))
+            self._small = np.empty((h, w, 3), dtype=np.uint8)
+        self._rgb = np.empty((h, w, 3), dtype=np.uint8)
+        self._frame_shape = frame.shape
+
+    def recognize(self, frame):
+        """Recognize known faces in a single BGR frame.
+
+        Args:
+            frame (numpy.ndarray): BGR image as returned by OpenCV `VideoCapture.read()`.
+
+        Returns:
+            list: Names of recognized people found in the frame. May be empty.
+
+        Raises:
+            RuntimeError: If `cv2` or `face_recognition` are not installed.
+        """
+        if self.known_index.ntotal == 0:
+            return []
+        try:
+            import cv2
+            import face_recognition
+        except Exception as e:
+            raise RuntimeError("cv2 and face_recognition are required to recognize faces. Install them via pip.") from e
+        import numpy as np
+
+        if frame.shape != self._frame_shape:
+            self._allocate(frame)
+
+        # Detect and encode on a downscaled copy (the `facerec_from_webcam_faster` recipe);
+        # locations are only used for encoding, so they never need scaling back up.
+        # Resizing first means the BGR->RGB conversion only touches the small image.
+        if self.scale != 1:
+            small = cv2.resize(frame, (self._small.shape[1], self._small.shape[0]), dst=self._small,
+                               interpolation=cv2.INTER_AREA)
+        else:
+            small = frame
+
+        if self.cache is not None:
+            key = _dhash(small)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return list(cached)
+
+        rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=self._rgb)
+        locations = face_recognition.face_locations(rgb, number_of_times_to_upsample=FACE_UPSAMPLE,
+                                                    model=FACE_MODEL)
+        # Boxes are in downscaled coordinates, so scale the full-frame threshold to match.
+        min_area = MIN_FACE_AREA * self.scale * self.scale
+        locations = [(t, r, b, l) for (t, r, b, l) in locations if (b - t) * (r - l) >= min_area]
+        encs = face_recognition.face_encodings(rgb, locations)
+        results = []
+        if encs:
+            # Query every detected face in one call; index distances are squared.
+            D, I = self.known_index.search(np.asarray(encs, dtype=np.float32), 1)
+            tol2 = self.tolerance * self.tolerance
+            # one vectorized tolerance check over all faces instead of a per-face branch
+            results = [self.known_names[i] for i in I[D[:, 0] <= tol2, 0].tolist()]
+        if self.cache is not None:
+            self.cache.put(key, results)
+        return results
+
+
+def recognize_faces(frame, known_index, known_names, tolerance=0.5, scale=FRAME_SCALE, cache=None):
     """Recognize known faces in a single BGR frame.
 
+    One-shot convenience wrapper around `FaceRecognizer`; loops should keep a
+    `FaceRecognizer` instead so its buffers are reused.
+
     Args:
         frame (numpy.ndarray): BGR image as returned by OpenCV `VideoCapture.read()`.
-        known_encodings (list): List of known face encodings.
-        known_names (list): List of names matching `known_encodings`.
-        tolerance (float): Distance threshold for `face_recognition.compare_faces`.
+        known_index: Index over known encodings from `load_known_faces`/`build_index`.
+        known_names (list): List of names matching the entries of `known_index`.
+        tolerance (float): Maximum Euclidean distance for a match to count.
+        scale (float): Per-side resize factor applied before detection and encoding;
+            1 disables resizing.
+        cache (RecognitionCache): Optional memo of recent frames; on a perceptual
+            hash hit its names are returned without running detection.
 
     Returns:
         list: Names of recognized people found in the frame. May be empty.
@@ -80,21 +516,4 @@ def recognize_faces(frame, known_encodings, known_names, tolerance=0.5):
     Raises:
         RuntimeError: If `cv2` or `face_recognition` are not installed.
     """
-    if not known_encodings:
-        return []
-    try:
-        import cv2
-        import face_recognition
-    except Exception as e:
-        raise RuntimeError("cv2 and face_recognition are required to recognize faces. Install them via pip.") from e
-
-    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    locations = face_recognition.face_locations(rgb)
-    encs = face_recognition.face_encodings(rgb, locations)
-    results = []
-    for enc in encs:
-        matches = face_recognition.compare_faces(known_encodings, enc, tolerance=tolerance)
-        if True in matches:
-            first_match_index = matches.index(True)
-            results.append(known_names[first_match_index])
-    return results
+    return FaceRecognizer(known_index, known_names, tolerance, scale, cache).recognize(frame)
@@ -32,13 +32,27 @@ except Exception:
 MAPPINGS_FILE = os.path.join(os.path.dirname(__file__), 'mappings.json')
 
 
+def _load_mappings(path):
+    """Read the person name -> Spotify URI mapping, or return {} if it can't be read."""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except Exception:
+        # default empty mapping
+        return {}
+
+
+# Loaded once at import; every SpotifyClient shares it.
+MAPPINGS = _load_mappings(MAPPINGS_FILE)
+
+
 class SpotifyClient:
     """A small Spotify playback client.
 
     Responsibilities:
     - Read `SPOTIPY_CLIENT_ID`, `SPOTIPY_CLIENT_SECRET`, and `SPOTIPY_REDIRECT_URI` from env.
     - Use Spotipy's `SpotifyOAuth` to obtain an access token and create a `spotipy.Spotify` client.
-    - Load `mappings.json` to map person names to Spotify URIs.
+    - Use `mappings.json` (loaded once at import) to map person names to Spotify URIs.
 
     Example mapping (`mappings.json`):
         { "Alice": "spotify:track:...", "Bob": "spotify:playlist:..." }
@@ -82,14 +96,17 @@ class SpotifyClient:
         # provides convenience wrappers but interfaces vary across versions.
         token = self.oauth.get_access_token(as_dict=False)
         self.sp = spotipy.Spotify(auth=token)
-
-        # load mappings (person name -> spotify URI)
-        try:
-            with open(MAPPINGS_FILE, 'r') as f:
-                self.mappings = json.load(f)
-        except Exception:
-            # default empty mapping
-            self.mappings = {}
+        # bound once so play_for doesn't repeat the attribute lookups per call
+        self._play = self.sp.start_playback
+
+        # mappings (person name -> spotify URI), pre-classified into the
+        # start_playback keyword each URI needs so play_for has no per-call branching
+        self.mappings = MAPPINGS
+        self._playback_args = {
+            name: ('uris', [uri]) if uri.startswith('spotify:track:') else ('context_uri', uri)
+            # entries that aren't a non-empty string are skipped like unmapped names
+            for name, uri in self.mappings.items() if uri and isinstance(uri, str)
+        }
 
     def play_for(self, name):
         """Start playback for the given person's mapped Spotify URI.
@@ -106,18 +123,14 @@ class SpotifyClient:
             - Otherwise, passes the URI as `context_uri` to `start_playback` so
               playlists/albums/context URIs work.
         """
-        uri = self.mappings.get(name)
-        if not uri:
+        kind, value = self._playback_args.get(name, (None, None))
+        if kind is None:
             print(f'No mapping found for {name}; skipping playback')
             return
         try:
-            # Try to start playback
-            if uri.startswith('spotify:track:'):
-                self.sp.start_playback(uris=[uri])
-            else:
-                # playlist/album/uri
-                self.sp.start_playback(context_uri=uri)
-            print(f'Started playback for {name}: {uri}')
+            # uris=[track] for tracks, context_uri for playlist/album/uri
+            self._play(**{kind: value})
+            print(f'Started playback for {name}: {self.mappings[name]}')
         except Exception as e:
             # Spotipy may raise SpotifyException or generic exceptions depending on version
             print('Spotify API error:', e)
@@ -0,0 +1,133 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+np = pytest.importorskip('numpy')
+
+import faces
+
+
+def test_flat_index_matches_brute_force():
+    rng = np.random.default_rng(0)
+    known = rng.normal(size=(50, faces.ENCODING_DIM)).astype(np.float32)
+    queries = rng.normal(size=(4, faces.ENCODING_DIM)).astype(np.float32)
+
+    D, I = faces.FlatL2Index(known).search(queries, 1)
+
+    expected = ((known[None, :, :] - queries[:, None, :]) ** 2).sum(axis=2)
+    assert I[:, 0].tolist() == expected.argmin(axis=1).tolist()
+    assert np.allclose(D[:, 0], expected.min(axis=1), rtol=1e-4)
+
+
+def test_load_known_faces_reuses_cache(tmp_path, monkeypatch):
+    import types
+
+    calls = []
+    fake = types.ModuleType('face_recognition')
+    fake.load_image_file = lambda path: calls.append(path) or path
+    fake.face_encodings = lambda image: [np.full(faces.ENCODING_DIM, len(calls), dtype=np.float32)]
+    monkeypatch.setitem(sys.modules, 'face_recognition', fake)
+
+    for person in ('Alice', 'Bob'):
+        (tmp_path / person).mkdir()
+        (tmp_path / person / 'img1.jpg').write_bytes(b'')
+    (tmp_path / 'Alice' / '.DS_Store').write_bytes(b'')
+
+    index, names = faces.load_known_faces(str(tmp_path), max_workers=1)
+    assert sorted(names) == ['Alice', 'Bob'] and len(calls) == 2
+
+    cached_index, cached_names = faces.load_known_faces(str(tmp_path), max_workers=1)
+    assert cached_names == names and len(calls) == 2
+    assert cached_index.ntotal == index.ntotal
+
+
+def test_numba_match_agrees_with_flat_index():
+    match_numba = pytest.importorskip('match_numba')
+    if match_numba.match is None:
+        pytest.skip('numba not installed')
+    rng = np.random.default_rng(1)
+    known = rng.normal(size=(200, faces.ENCODING_DIM)).astype(np.float32)
+    q = rng.normal(size=faces.ENCODING_DIM).astype(np.float32)
+    index = faces.FlatL2Index(known)
+
+    D, I = index.search(q[None, :], 1)
+    idx, dist2 = match_numba.match(index.xb, index.sq_norms, q)
+
+    assert idx == I[0, 0]
+    assert np.isclose(dist2, D[0, 0], rtol=1e-3)
+
+
+def test_int8_index_keeps_nearest_neighbour():
+    rng = np.random.default_rng(2)
+    # dlib encodings are small values in roughly [-0.3, 0.3]
+    known = rng.uniform(-0.3, 0.3, size=(100, faces.ENCODING_DIM)).astype(np.float32)
+    queries = known[:5] + rng.normal(scale=0.01, size=(5, faces.ENCODING_DIM)).astype(np.float32)
+
+    index = faces.build_index(known, quantize=True)
+    D, I = index.search(queries, 1)
+
+    assert isinstance(index, faces.Int8FlatL2Index) and index.xb.dtype == np.int8
+    assert I[:, 0].tolist() == [0, 1, 2, 3, 4]
+    expected = ((known[:5] - queries) ** 2).sum(axis=1)
+    assert np.allclose(D[:, 0], expected, atol=0.02)
+
+
+def test_recognition_cache_evicts_least_recently_used():
+    cache = faces.RecognitionCache(maxsize=2)
+    cache.put(b'a', ['Alice'])
+    cache.put(b'b', [])
+    assert cache.get(b'a') == ('Alice',)
+
+    cache.put(b'c', ['Bob'])
+
+    assert cache.get(b'b') is None
+    assert cache.get(b'a') == ('Alice',) and cache.get(b'c') == ('Bob',)
+
+
+def test_int8_index_numba_and_numpy_paths_agree(monkeypatch):
+    match_numba = pytest.importorskip('match_numba')
+    if match_numba.dots_int8 is None:
+        pytest.skip('numba not installed')
+    rng = np.random.default_rng(3)
+    known = rng.uniform(-0.3, 0.3, size=(300, faces.ENCODING_DIM)).astype(np.float32)
+    queries = rng.uniform(-0.3, 0.3, size=(3, faces.ENCODING_DIM)).astype(np.float32)
+    index = faces.Int8FlatL2Index(known)
+
+    D_numba, I_numba = index.search(queries, 1)
+    monkeypatch.setattr(match_numba, 'dots_int8', None)
+    monkeypatch.setattr(faces, 'INT8_CHUNK_ROWS', 128)
+    D_numpy, I_numpy = index.search(queries, 1)
+
+    assert I_numba.tolist() == I_numpy.tolist()
+    assert np.allclose(D_numba, D_numpy, rtol=1e-5)
+
+
+def test_load_known_faces_skips_cache_after_encode_error(tmp_path, monkeypatch):
+    import types
+
+    calls = []
+
+    def load_image_file(path):
+        calls.append(path)
+        if path.endswith('broken.jpg'):
+            raise OSError('cannot decode')
+        return path
+
+    fake = types.ModuleType('face_recognition')
+    fake.load_image_file = load_image_file
+    fake.face_encodings = lambda image: [np.zeros(faces.ENCODING_DIM, dtype=np.float32)]
+    monkeypatch.setitem(sys.modules, 'face_recognition', fake)
+
+    (tmp_path / 'Alice').mkdir()
+    (tmp_path / 'Alice' / 'img1.jpg').write_bytes(b'')
+    (tmp_path / 'Alice' / 'broken.jpg').write_bytes(b'')
+
+    _, names = faces.load_known_faces(str(tmp_path), max_workers=1)
+    assert names == ['Alice']
+    assert not (tmp_path / faces.CACHE_FILENAME).exists()
+
+    faces.load_known_faces(str(tmp_path), max_workers=1)
+    assert len(calls) == 4
@@ -0,0 +1,61 @@
+import os
+import sys
+import types
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import spotify_client
+
+
+class FakeOAuth:
+    def __init__(self, **kwargs):
+        pass
+
+    def get_cached_token(self):
+        return {'access_token': 'token'}
+
+    def get_access_token(self, as_dict=False):
+        return 'token'
+
+
+class FakeSpotify:
+    def __init__(self, auth=None):
+        self.calls = []
+
+    def start_playback(self, **kwargs):
+        self.calls.append(kwargs)
+
+
+def make_client(monkeypatch, mappings):
+    monkeypatch.setattr(spotify_client, 'spotipy', types.SimpleNamespace(Spotify=FakeSpotify))
+    monkeypatch.setattr(spotify_client, 'SpotifyOAuth', FakeOAuth)
+    monkeypatch.setattr(spotify_client, 'MAPPINGS', mappings)
+    monkeypatch.setenv('SPOTIPY_CLIENT_ID', 'id')
+    monkeypatch.setenv('SPOTIPY_CLIENT_SECRET', 'secret')
+    monkeypatch.setenv('SPOTIPY_REDIRECT_URI', 'http://localhost:8888/callback')
+    return spotify_client.SpotifyClient()
+
+
+def test_play_for_uses_track_and_context_uris(monkeypatch):
+    client = make_client(monkeypatch, {
+        'Alice': 'spotify:track:abc',
+        'Bob': 'spotify:playlist:xyz',
+    })
+
+    client.play_for('Alice')
+    client.play_for('Bob')
+
+    assert client.sp.calls == [
+        {'uris': ['spotify:track:abc']},
+        {'context_uri': 'spotify:playlist:xyz'},
+    ]
+
+
+def test_invalid_mappings_are_treated_as_unmapped(monkeypatch, capsys):
+    client = make_client(monkeypatch, {'X': 5, 'Y': '', 'Z': ['spotify:track:abc']})
+
+    for name in ('X', 'Y', 'Z'):
+        client.play_for(name)
+
+    assert client.sp.calls == []
+    assert capsys.readouterr().out.count('No mapping found') == 3